@@ -3,12 +3,20 @@ import tkinter as tk
 import tkinter.ttk as ttk
 import tkinter.messagebox as messagebox
 import tkinter.simpledialog as simpledialog
-import google.generativeai as genai
 from dotenv import load_dotenv
+import asyncio
+import functools
 import threading
 import sys
 
-from google.api_core.exceptions import ResourceExhausted
+# google.generativeai (and its protobuf/gRPC dependencies) is imported lazily
+# inside _bootstrap_api so the Tk window can paint before that several-hundred
+# millisecond import cost is paid. These names are filled in at config time.
+genai = None
+ResourceExhausted = None
+# Starts broad so a failed SDK import is still caught by the config-error
+# handler; narrowed to the real class once the import succeeds.
+GoogleAPIError = Exception
 
 # --- Configuration Toggle ---
 # Set this to True to try loading the API key from a .env file first.
@@ -17,48 +25,47 @@ USE_ENV_FILE = True # <--- TOGGLE THIS VALUE
 
 
 # --- API Setup (Initial Loading Attempt) ---
-# Determine the path to the .env file within the bundled executable or use default search
-dotenv_path = None
-if USE_ENV_FILE: # Check the toggle
+@functools.lru_cache(maxsize=None)
+def _resolve_dotenv_path():
+    # Determine the path to the .env file within the bundled executable or use
+    # default search. Memoized so repeat lookups (e.g. a reload-key flow)
+    # skip the abspath work.
     if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
         # We are running from a PyInstaller bundle (_MEIPASS exists)
         bundle_dir = sys._MEIPASS
-        dotenv_path = os.path.join(bundle_dir, ".env")
-        # Note: No need to explicitly check os.path.exists(dotenv_path) here,
-        # load_dotenv handles non-existent paths gracefully.
-    else:
-        # Not running from a PyInstaller bundle (running from source)
-        # Use a common pattern to find the .env file in the source directory
-        # This assumes .env is in the same directory as your script or a parent
-        try:
-            # Use a more robust way to find the script's directory when not frozen
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            dotenv_path = os.path.join(script_dir, ".env")
-            # Check if .env actually exists at this path
-            if not os.path.exists(dotenv_path):
-                dotenv_path = None # If not found next to script, fallback below
-        except NameError:
-            # __file__ is not defined when running interactively
-            dotenv_path = None # Fallback below
-
-
-# Now attempt to load the .env file using the determined path (if set) or default search
-if USE_ENV_FILE: # Check the toggle again before loading
+        return os.path.join(bundle_dir, ".env")
+    # Not running from a PyInstaller bundle (running from source)
+    # This assumes .env is in the same directory as your script or a parent
+    try:
+        # Use a more robust way to find the script's directory when not frozen
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        # No os.path.exists probe here: load_dotenv already handles a missing
+        # file gracefully, so checking first would just be an extra stat()
+        return os.path.join(script_dir, ".env")
+    except NameError:
+        # __file__ is not defined when running interactively
+        return None # Fallback to default search
+
+
+# Check the OS environment FIRST: if the key is already set there, we can skip
+# the load_dotenv disk IO and parsing entirely on startup.
+API_KEY = os.environ.get("GOOGLE_API_KEY")
+
+if API_KEY is None and USE_ENV_FILE: # Check the toggle before loading
     try:
+        dotenv_path = _resolve_dotenv_path()
         if dotenv_path:
-            load_dotenv(dotenv_path=dotenv_path)
+            load_dotenv(dotenv_path=dotenv_path, override=False)
         else:
             # Fallback if dotenv_path is None (e.g., not found in bundle or find_dotenv failed)
-            load_dotenv()
+            load_dotenv(override=False)
 
     except Exception as e:
         # Keep this print for console debugging during development/testing if load_dotenv itself fails
         print(f"Error during load_dotenv execution: {e}")
 
-
-# Get the API Key value after initial loading from environment variables
-# os.getenv will check both OS environment variables and variables loaded by load_dotenv
-API_KEY = os.getenv("GOOGLE_API_KEY")
+    # Re-check after loading the .env file
+    API_KEY = os.getenv("GOOGLE_API_KEY")
 
 chat = None
 model = None
@@ -81,6 +88,11 @@ Also try to keep your responses on the shorter side to save on their free usage
 
 # --- GUI Setup and Logic ---
 
+# Maximum number of lines kept in the transcript. Tk's Text widget stores the
+# transcript in a B-tree that grows without bound, so inserts and see(END) get
+# slower the longer a session runs. Trimming old lines keeps it flat.
+MAX_TRANSCRIPT_LINES = 2000
+
 # Define dark mode colors
 DARK_BACKGROUND = "#0F0F0F"
 DARK_FOREGROUND = "#DC0707"
@@ -128,11 +140,40 @@ text_area = tk.Text(
     font=("Verdana", 15),
     bg=DARK_BACKGROUND,
     fg=DARK_FOREGROUND,
-    insertbackground="white",
-    state=tk.DISABLED
+    insertbackground="white"
 )
 text_area.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
+
+# Keep the widget in NORMAL state permanently and block user edits via a key
+# binding instead. Toggling state=DISABLED/NORMAL around every insert costs
+# two extra Tcl configure commands per append, which adds up under streaming.
+
+# Pure navigation keys only move the insert mark, so they are safe to let
+# through and keep keyboard scrolling working as it did when DISABLED
+_NAV_KEYSYMS = frozenset((
+    'Up', 'Down', 'Left', 'Right', 'Prior', 'Next', 'Home', 'End',
+))
+
+
+def _block_edits(event):
+    # Let copy/select-all shortcuts (Control held) through; swallow the rest
+    if event.state & 0x4 and event.keysym.lower() in ('c', 'a'):
+        return None
+    if event.keysym in _NAV_KEYSYMS:
+        return None
+    return "break"
+
+
+text_area.bind("<Key>", _block_edits)
+
+# Mouse-driven edits bypass the <Key> binding: the Text class binding for
+# <<PasteSelection>> (middle-click on X11) would insert the PRIMARY selection
+# into the permanently-NORMAL widget. Block those routes too.
+for _edit_event in ("<<PasteSelection>>", "<Button-2>", "<<Paste>>",
+                    "<<Cut>>", "<<Clear>>"):
+    text_area.bind(_edit_event, lambda e: "break")
+
 # Link the scrollbar to the text widget
 scrollbar.config(command=text_area.yview)
 text_area.config(yscrollcommand=scrollbar.set)
@@ -144,104 +185,240 @@ text_area.tag_config('error', foreground="red")
 
 
 # Insert the initial message and APPLY the 'ai_msg' tag
-text_area.config(state=tk.NORMAL)
 text_area.insert(tk.END, "AI Helper: Hello! Please tell me what's on your mind today. I'm here to listen.\nPlease give me time to respond to each prompt.\n\n", 'ai_msg')
-text_area.config(state=tk.DISABLED) # Disable again
 
 
-# --- Place API Setup AFTER GUI is created AND initial message inserted ---
-try:
-    # Check if API_KEY is found after initial .env loading (if attempted)
-    # This check happens REGARDLESS of the USE_ENV_FILE toggle
-    if not API_KEY:
-        # --- Show message box with instructions FIRST ---
+# --- API Setup (runs on the first UI ticks, after the window has painted) ---
+MODEL_NAME = 'gemini-2.0-flash-lite' # Your chosen model
+
+# Every turn resends the full chat history to Gemini, so an unbounded history
+# means request size (and billed tokens) grows with session length. Cap it,
+# always keeping the two priming entries (persona prompt + greeting).
+MAX_HISTORY_ENTRIES = 40
+PRIMING_HISTORY_ENTRIES = 2
+
+
+@functools.lru_cache(maxsize=1)
+def _get_model(api_key):
+    # Memoize the configured model per key: re-entering the same key (e.g.
+    # after an auth error) reuses the existing model and its live gRPC
+    # channel instead of rebuilding both; only a genuinely new key
+    # reconfigures.
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(MODEL_NAME)
+
+
+def _bootstrap_api():
+    global genai, ResourceExhausted, GoogleAPIError
+    global API_KEY, chat, model, API_CONFIG_SUCCESS
+
+    # An after(0) timer fires before Tk's idle-time redraw, so without this
+    # the window would map but sit unpainted through the genai import and the
+    # modal key dialogs. Flush the pending redraws first so the window is
+    # actually drawn before the heavy work starts.
+    root.update_idletasks()
+
+    try:
+        # Import the SDK here rather than at module top: this pulls in
+        # protobuf, gRPC and google.api_core, which would otherwise delay the
+        # first window paint by the whole import cost
+        import google.generativeai as genai
+        from google.api_core.exceptions import GoogleAPIError, ResourceExhausted
+
+        # Check if API_KEY is found after initial .env loading (if attempted)
+        # This check happens REGARDLESS of the USE_ENV_FILE toggle
+        if not API_KEY:
+            # --- Show message box with instructions FIRST ---
+            messagebox.showinfo(
+                "API Key Missing",
+                "Google API Key not found.\n\n"
+                "To get a key:\n"
+                "1. Go to Google AI Studio: https://aistudio.google.com/\n"
+                "    Or search gemini API on google.\n"
+                "2. Log in with your Google Account.\n"
+                "3. Click 'Get API key', then 'Create API key'.\n"
+                "4. Generate an api key.\n"
+                "5. Copy your new API key.\n\n"
+                "Click OK to enter your key."
+            )
+            # --- Then, show the input dialog ---
+            provided_key = simpledialog.askstring(
+                "Enter API Key",
+                "Please paste your Google API Key:",
+                parent=root
+            )
+
+            if provided_key:
+                API_KEY = provided_key # Update API_KEY with the user's input
+            else:
+                # User cancelled the dialog or entered nothing
+                # Raise a ValueError so the outer except block catches it
+                raise ValueError("API Key input cancelled or empty.")
+
+
+        # Now attempt to configure genai with the (potentially updated) API_KEY
+        model = _get_model(API_KEY)
+
+        chat = model.start_chat(history=[
+            {"role": "user", "parts": [initial_prompt]},
+            {"role": "model", "parts": ["Hello. Please tell me what's on your mind today. I'm here to listen."] }
+        ])
+        API_CONFIG_SUCCESS = True # Set flag if config was successful
+
+    # Catch user cancellation separately from real API config failures; no
+    # catch-all Exception handler so genuine bugs surface instead of being
+    # masked as config errors
+    except ValueError:
+        # User cancelled the key dialog or entered nothing; this is a normal
+        # shutdown, so skip the error formatting and go straight to closing
+        API_CONFIG_SUCCESS = False # Ensure flag is False
         messagebox.showinfo(
-            "API Key Missing",
-            "Google API Key not found.\n\n"
-            "To get a key:\n"
-            "1. Go to Google AI Studio: https://aistudio.google.com/\n"
-            "    Or search gemini API on google.\n"
-            "2. Log in with your Google Account.\n"
-            "3. Click 'Get API key', then 'Create API key'.\n"
-            "4. Generate an api key.\n"
-            "5. Copy your new API key.\n\n"
-            "Click OK to enter your key."
-        )
-        # --- Then, show the input dialog ---
-        provided_key = simpledialog.askstring(
-            "Enter API Key",
-            "Please paste your Google API Key:",
-            parent=root
+            "API Key Required",
+            "No API key was provided.\n\nThe application will now close."
         )
+        root.destroy()
 
-        if provided_key:
-            API_KEY = provided_key # Update API_KEY with the user's input
-        else:
-            # User cancelled the dialog or entered nothing
-            # Raise a ValueError so the outer except block catches it
-            raise ValueError("API Key input cancelled or empty.")
-
-
-    # Now attempt to configure genai with the (potentially updated) API_KEY
-    genai.configure(api_key=API_KEY)
-    MODEL_NAME = 'gemini-2.0-flash-lite' # Your chosen model
-    model = genai.GenerativeModel(MODEL_NAME)
-
-    chat = model.start_chat(history=[
-        {"role": "user", "parts": [initial_prompt]},
-        {"role": "model", "parts": ["Hello. Please tell me what's on your mind today. I'm here to listen."] }
-    ])
-    API_CONFIG_SUCCESS = True # Set flag if config was successful
-
-# Catch ValueError (missing key initially or input cancelled) or other config errors
-except (ValueError, Exception) as e:
-    API_CONFIG_SUCCESS = False # Ensure flag is False
-    error_message = f"Error configuring API: {e}"
-    print(error_message) # Keep this print for console debugging
-
-    # Display error in the text area and show a message box
-    text_area.config(state=tk.NORMAL)
-    text_area.insert(tk.END, f"\nSystem Error: {error_message}\n", 'error')
-    text_area.config(state=tk.DISABLED)
-    text_area.see(tk.END)
+    except GoogleAPIError as e:
+        API_CONFIG_SUCCESS = False # Ensure flag is False
+        error_message = f"Error configuring API: {e}"
+        print(error_message) # Keep this print for console debugging
+
+        # Display error in the text area and show a message box
+        text_area.insert(tk.END, f"\nSystem Error: {error_message}\n", 'error')
+        text_area.see(tk.END)
+
+        messagebox.showerror("API Configuration Error", error_message + "\n\nThe application will now close.")
+
+        root.destroy()
 
-    messagebox.showerror("API Configuration Error", error_message + "\n\nThe application will now close.")
 
-    root.destroy()
+# --- Transcript helpers (must run on the UI thread) ---
+def _trim_transcript():
+    # Drop the oldest lines once the transcript exceeds the cap, so the
+    # Text widget's B-tree stays a bounded size no matter how long the
+    # session runs.
+    line_count = int(text_area.index('end-1c').split('.')[0])
+    if line_count > MAX_TRANSCRIPT_LINES:
+        text_area.delete('1.0', f'{line_count - MAX_TRANSCRIPT_LINES}.0')
 
 
-# --- Function to handle the API call in a separate thread ---
-def get_ai_response_thread(user_input):
+def _ui_append(text, tag='ai_msg'):
+    # Single UI-thread hop: insert, trim and scroll in one scheduled
+    # callback instead of several queued root.after calls.
+    text_area.insert(tk.END, text, tag)
+    _trim_transcript()
+    # Force the display-line metrics to be computed now (Tk 8.6), while we
+    # are already here, so the see() below and later scrolls don't trigger
+    # the O(transcript) lazy reflow Tk does on first use
+    text_area.count('1.0', 'end', 'displaylines')
+    text_area.see(tk.END)
+
+
+# --- Streaming chunk buffering ---
+# The response coroutine appends streamed tokens straight into this buffer and arms at
+# most one idle-time flush, which joins everything pending into a single Text
+# insert. This cuts both the root.after traffic and the Tcl insert count from
+# one per token down to roughly one per burst.
+_pending = []
+_pending_lock = threading.Lock()
+_flush_scheduled = False
+
+
+def _queue_chunk(text, tag='ai_msg'):
+    # Called from the asyncio loop thread. Error lines go through here too,
+    # not via a separate root.after(0, ...): timer callbacks are serviced
+    # before idle callbacks, so a direct path could render an error ahead of
+    # partial reply text still waiting in the buffer.
+    global _flush_scheduled
+    with _pending_lock:
+        _pending.append((text, tag))
+        if not _flush_scheduled:
+            _flush_scheduled = True
+            root.after_idle(_flush_chunks)
+
+
+def _flush_chunks():
+    # Runs on the UI thread
+    global _flush_scheduled
+    with _pending_lock:
+        _flush_scheduled = False
+        chunks = _pending[:]
+        _pending.clear()
+    # Join consecutive same-tag runs so a normal burst is still one insert
+    i = 0
+    while i < len(chunks):
+        tag = chunks[i][1]
+        j = i
+        while j < len(chunks) and chunks[j][1] == tag:
+            j += 1
+        _ui_append("".join(text for text, _ in chunks[i:j]), tag)
+        i = j
+
+
+# --- Async event loop running alongside Tk ---
+# One asyncio loop in a daemon thread replaces the queue-fed worker thread:
+# the SDK's async client parks network waits on the loop instead of holding a
+# thread blocked for seconds per request, and leaves room for cancellation
+# later without killing a thread.
+_loop = asyncio.new_event_loop()
+threading.Thread(target=_loop.run_forever, daemon=True).start()
+
+# Serialize turns so a second send waits for the current response, preserving
+# the sequential semantics the request queue used to guarantee
+_chat_lock = asyncio.Lock()
+
+
+# --- Coroutine handling the API call on the asyncio loop ---
+async def _get_ai_response(user_input):
     # Check the flag instead of just 'if chat is None'
     if not API_CONFIG_SUCCESS or chat is None:
         return
 
-    try:
-        response = chat.send_message(user_input)
-        ai_response_text = response.text
-        # Schedule AI response display
-        root.after(0, lambda: text_area.config(state=tk.NORMAL))
-        root.after(0, text_area.insert, tk.END, "AI Helper: " + ai_response_text + "\n\n", 'ai_msg')
-        root.after(0, lambda: text_area.config(state=tk.DISABLED))
-
-    # --- Catch the specific ResourceExhausted error ---
-    except ResourceExhausted as e:
-        print(f"Resource Exhausted Error: {e}") # Keep this print for console debugging
-        custom_error_message = "Free usage limit hit. Please check your Google Cloud Console or set up billing."
-        # Schedule custom error message display
-        root.after(0, lambda: text_area.config(state=tk.NORMAL))
-        root.after(0, text_area.insert, tk.END, f"AI Helper: {custom_error_message}\n", 'error')
-        root.after(0, lambda: text_area.config(state=tk.DISABLED))
-
-    except Exception as e:
-        print(f"An unexpected API error occurred: {e}") # Keep this print for console debugging
-        # Schedule generic error message display
-        root.after(0, lambda: text_area.config(state=tk.NORMAL))
-        root.after(0, text_area.insert, tk.END, f"API Error: An unexpected error occurred.\n", 'error') # Generic GUI message
-        root.after(0, lambda: text_area.config(state=tk.DISABLED))
-
-    # Schedule scrolling to the bottom
-    root.after(0, text_area.see, tk.END)
+    async with _chat_lock:
+        try:
+            # Stream the response so text appears as it is generated instead
+            # of blocking until the whole reply is ready
+            stream = await chat.send_message_async(user_input, stream=True)
+            _queue_chunk("AI Helper: ")
+            async for chunk in stream:
+                if chunk.text:
+                    _queue_chunk(chunk.text)
+            _queue_chunk("\n\n")
+
+            # Trim the history once the full response has been consumed,
+            # keeping the priming entries plus the most recent turns. This
+            # keeps per-turn request size (and latency) flat instead of
+            # growing with the session.
+            if len(chat.history) > MAX_HISTORY_ENTRIES:
+                keep_recent = MAX_HISTORY_ENTRIES - PRIMING_HISTORY_ENTRIES
+                chat.history[:] = (chat.history[:PRIMING_HISTORY_ENTRIES]
+                                   + chat.history[-keep_recent:])
+
+        # --- Catch the specific ResourceExhausted error ---
+        except ResourceExhausted as e:
+            print(f"Resource Exhausted Error: {e}") # Keep this print for console debugging
+            custom_error_message = "Free usage limit hit. Please check your Google Cloud Console or set up billing."
+            # Queue the custom error message behind any pending reply text
+            _queue_chunk(f"AI Helper: {custom_error_message}\n", 'error')
+
+        except Exception as e:
+            print(f"An unexpected API error occurred: {e}") # Keep this print for console debugging
+            # Queue the generic error message behind any pending reply text
+            _queue_chunk("API Error: An unexpected error occurred.\n", 'error') # Generic GUI message
+
+
+def _turn_done(future):
+    # Surface anything the coroutine's own handlers missed (e.g. a failure
+    # before the try block was entered)
+    exc = future.exception()
+    if exc is not None:
+        print(f"An unexpected API error occurred: {exc}") # Keep this print for console debugging
+        _queue_chunk("API Error: An unexpected error occurred.\n", 'error')
+
+
+def _submit_turn(user_input):
+    future = asyncio.run_coroutine_threadsafe(_get_ai_response(user_input), _loop)
+    future.add_done_callback(_turn_done)
 
 
 # --- Modified send_message function ---
@@ -251,29 +428,33 @@ def send_message():
         messagebox.showwarning("API Unavailable", "API is not configured. Please check setup.") # Optional: show warning box
         return # Stop here if API isn't ready
 
-    user_input = input_field.get()
+    user_input = _input_var.get()
     if not user_input:
         return
+    _input_var.set("") # Clear the entry in one atomic operation
 
-    text_area.config(state=tk.NORMAL)
     text_area.insert(tk.END, "You: " + user_input + "\n\n", 'user_msg')
-    text_area.config(state=tk.DISABLED)
-
-    input_field.delete(0, tk.END)
+    _trim_transcript()
+    text_area.count('1.0', 'end', 'displaylines') # Keep line metrics warm
 
     # Scroll to show the user's message
     text_area.see(tk.END)
 
-    api_thread = threading.Thread(target=get_ai_response_thread, args=(user_input,))
-    api_thread.start()
+    # Hand the request to the asyncio loop
+    _submit_turn(user_input)
 
 
 # --- Input field and send button frame ---
 input_frame = tk.Frame(root, bg=DARK_BACKGROUND, borderwidth=1, relief="solid")
 input_frame.pack(padx=10, pady=5, fill=tk.X)
 
+# Back the entry with a StringVar: reading it is a cached Python-level access
+# rather than a Tcl get round trip, and clearing it is one atomic set("")
+_input_var = tk.StringVar()
+
 input_field = tk.Entry(
     input_frame,
+    textvariable=_input_var,
     font=("Verdana", 15),
     bg=INPUT_BACKGROUND,
     fg=DARK_FOREGROUND,
@@ -298,9 +479,10 @@ send_button = tk.Button(
 )
 send_button.pack(side=tk.RIGHT)
 
-# --- Check if API config was successful before starting the main loop ---
-if API_CONFIG_SUCCESS:
-    root.mainloop() # Start the GUI event loop only if API configured
-else:
-    # If API config failed, root.destroy() was called in the except block
-    pass # Do nothing here, application will exit
\ No newline at end of file
+# --- Start the main loop ---
+# Schedule the API bootstrap (heavy genai import plus any key-entry dialogs)
+# for the first idle tick, so the window appears immediately instead of
+# blocking on a nested dialog event loop before mainloop starts. If config
+# fails, _bootstrap_api destroys the root and the mainloop exits.
+root.after(0, _bootstrap_api)
+root.mainloop()
\ No newline at end of file